@@ -80,9 +80,10 @@ class CARLAgent(PPOAgent):
         # network specification
         network_spec = kwargs.pop('network', {})
         network_spec.setdefault('network', CARLANetwork)
-        network_spec.setdefault('control_policy', self.DEFAULT_CONTROL)
-        network_spec.setdefault('control_value', self.DEFAULT_CONTROL_VALUE)
-        network_spec.setdefault('dynamics', self.DEFAULT_DYNAMICS)
+        # copy the class-level defaults, so that downstream pops/merges never mutate them across instances
+        network_spec.setdefault('control_policy', dict(self.DEFAULT_CONTROL))
+        network_spec.setdefault('control_value', dict(self.DEFAULT_CONTROL_VALUE))
+        network_spec.setdefault('dynamics', dict(self.DEFAULT_DYNAMICS))
 
         self.should_update_dynamics = update_dynamics
         self.dynamics_path = os.path.join(kwargs.get('weights_dir', 'weights'), name, 'dynamics_model')
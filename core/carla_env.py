@@ -64,6 +64,11 @@ class CARLAEnv(ThreeCameraCARLAEnvironment):
         self.NAVIGATION_FEATURES['space'] = spaces.Box(low=0.0, high=25.0, shape=(self.num_waypoints,))
         self.NAVIGATION_FEATURES['default'] = np.zeros(shape=self.num_waypoints, dtype=np.float32)
 
+        # precomputed default (empty) observation: contents are the read-only default arrays, so a
+        # single dict instance can be shared across time-horizon slots and resets
+        self.default_obs = dict(image=self.default_image, vehicle=self.VEHICLE_FEATURES['default'],
+                                road=self.ROAD_FEATURES['default'], navigation=self.NAVIGATION_FEATURES['default'])
+
         # statistics
         self.episode = -1
         self.timestep = 0
@@ -72,6 +77,10 @@ class CARLAEnv(ThreeCameraCARLAEnvironment):
         self.range_controls = {} if range_controls is None else range_controls
         self.info_buffer = {k: [] for k in self.info_space.spaces.keys()}
 
+        # bound `append` methods, looked-up once: `reset_info` clears the lists in-place so these
+        # stay valid across episodes
+        self._info_appends = {k: buffer.append for k, buffer in self.info_buffer.items()}
+
         # time horizon and past obs:
         self.time_horizon = time_horizon
         self.past_obs_freq = past_obs_freq
@@ -125,18 +134,27 @@ class CARLAEnv(ThreeCameraCARLAEnvironment):
                                                                  image_size_y=self.image_size[1],
                                                                  sensor_tick=self.tick_time))
 
+    # spaces are static, so both Dicts are built once on first access instead of at every lookup
+    _observation_space = None
+    _info_space = None
+
     @property
     def observation_space(self) -> spaces.Space:
-        return spaces.Dict(road=self.ROAD_FEATURES['space'], vehicle=self.VEHICLE_FEATURES['space'],
-                           image=self.image_space, navigation=self.NAVIGATION_FEATURES['space'])
+        if self._observation_space is None:
+            self._observation_space = spaces.Dict(road=self.ROAD_FEATURES['space'],
+                                                  vehicle=self.VEHICLE_FEATURES['space'],
+                                                  image=self.image_space, navigation=self.NAVIGATION_FEATURES['space'])
+        return self._observation_space
 
     @property
     def info_space(self) -> spaces.Space:
-        space: spaces.Dict = super().info_space
+        if self._info_space is None:
+            space: spaces.Dict = super().info_space
 
-        return spaces.Dict(episode=spaces.Discrete(n=1), timestep=spaces.Discrete(n=1),
-                           total_reward=spaces.Box(low=-np.inf, high=np.inf, shape=(1,)),
-                           reward=spaces.Box(low=-np.inf, high=np.inf, shape=(1,)), **space.spaces)
+            self._info_space = spaces.Dict(episode=spaces.Discrete(n=1), timestep=spaces.Discrete(n=1),
+                                           total_reward=spaces.Box(low=-np.inf, high=np.inf, shape=(1,)),
+                                           reward=spaces.Box(low=-np.inf, high=np.inf, shape=(1,)), **space.spaces)
+        return self._info_space
 
     def actions_to_control(self, actions):
         """Converts the given actions to vehicle's control"""
@@ -243,8 +261,10 @@ class CARLAEnv(ThreeCameraCARLAEnvironment):
         state, reward, done, info = super().step(actions)
 
         if self.timestep % self.info_every == 0:
+            appends = self._info_appends
+
             for k, v in info.items():
-                self.info_buffer[k].append(v)
+                appends[k](v)
 
         self.timestep += 1
         self.total_reward += reward
@@ -300,29 +320,27 @@ class CARLAEnv(ThreeCameraCARLAEnvironment):
 
     def _get_observation(self, sensors_data: dict) -> dict:
         if len(sensors_data.keys()) == 0:
-            # return default obs
-            return dict(image=self.default_image, vehicle=self.VEHICLE_FEATURES['default'],
-                        road=self.ROAD_FEATURES['default'], navigation=self.NAVIGATION_FEATURES['default'])
+            return self.default_obs
 
-        # get image, reshape, and scale
-        image = np.asarray(sensors_data['camera'], dtype=np.float32)
+        # get image, reshape, and scale: kept uint8 through resizing, cast to float only at the end
+        image = sensors_data['camera']
 
         if image.shape != self.image_shape:
             image = env_utils.resize(image, size=self.image_size)
 
-        image /= 255.0
+        image = np.asarray(image, dtype=np.float32) / 255.0
 
         # features
         vehicle_obs = self._get_vehicle_features()
         road_obs = self._get_road_features()
         navigation_obs = self._get_navigation_features()
 
-        obs = dict(image=image, vehicle=vehicle_obs, road=road_obs, navigation=navigation_obs)
+        obs = {'image': image, 'vehicle': vehicle_obs, 'road': road_obs, 'navigation': navigation_obs}
         return env_utils.replace_nans(obs)
 
     def _init_past_obs(self) -> list:
         """Returns a list of empty observations"""
-        return [self._get_observation(sensors_data={}) for _ in range(self.time_horizon)]
+        return [self.default_obs] * self.time_horizon
 
     def get_info(self) -> dict:
         info = super().get_info()
@@ -368,18 +386,18 @@ class CARLAEnv(ThreeCameraCARLAEnvironment):
         """
         vehicle_location = self.vehicle.get_location()
         waypoints = self.route.get_next_waypoints(amount=self.num_waypoints)
-        distances = []
 
-        for w in waypoints:
-            d = carla_utils.l2_norm(vehicle_location, w.transform.location) / self.num_waypoints
-            distances.append(d)
+        # vectorized (numpy) distances: one norm over an (N, 3) array instead of N l2_norm calls
+        locations = np.array([[w.transform.location.x, w.transform.location.y, w.transform.location.z]
+                              for w in waypoints])
+        deltas = locations - np.array([vehicle_location.x, vehicle_location.y, vehicle_location.z])
+        distances = np.sqrt(np.sum(np.square(deltas), axis=1)) / self.num_waypoints
 
-        # pad the list with last (thus greater) distance if smaller then required
-        if len(distances) < self.num_waypoints:
-            for _ in range(self.num_waypoints - len(distances)):
-                distances.append(distances[-1])
+        # pad the array with last (thus greater) distance if smaller then required
+        if distances.shape[0] < self.num_waypoints:
+            distances = np.pad(distances, pad_width=(0, self.num_waypoints - distances.shape[0]), mode='edge')
 
-        return np.array(distances)
+        return distances
 
     def _update_target_waypoint(self):
         super()._update_target_waypoint()
@@ -1,6 +1,7 @@
 import time
 import random
 import carla
+import multiprocessing as mp
 
 from rl import CARLACollectWrapper, utils
 from rl.environments.carla import env_utils as carla_utils
@@ -8,7 +9,9 @@ from rl import *
 
 from core import CARLAEnv, CARLAgent
 
-from typing import Union
+from rl.parameters import DynamicParameter
+
+from typing import NamedTuple, Union
 
 
 # -------------------------------------------------------------------------------------------------
@@ -60,6 +63,20 @@ def define_env(image_shape=(90, 120, 3), render=True, town: Union[None, str] = '
                 image_shape=image_shape, **kwargs)
 
 
+class StageHParams(NamedTuple):
+    """Groups the decay-able hyper-parameters shared by every curriculum stage, with their defaults"""
+    policy_lr: Union[float, DynamicParameter] = 3e-4
+    value_lr: Union[float, DynamicParameter] = 3e-4
+    clip_ratio: Union[float, DynamicParameter] = 0.2
+    entropy_regularization: Union[float, DynamicParameter] = 0.1
+    dynamics_lr: Union[float, DynamicParameter] = 3e-4
+
+    @classmethod
+    def from_kwargs(cls, kwargs: dict) -> 'StageHParams':
+        """Pops the stage-wide hyper-parameters from `kwargs`, falling back to the declared defaults"""
+        return cls(**{name: kwargs.pop(name) for name in cls._fields if name in kwargs})
+
+
 # -------------------------------------------------------------------------------------------------
 # -- Stage
 # -------------------------------------------------------------------------------------------------
@@ -74,6 +91,7 @@ class Stage:
 
         # Agent
         self.agent_class = agent.pop('class', agent.pop('class_'))
+        self.warm_start_from = agent.pop('warm_start_from', None)
         self.agent_args = agent
         self.agent = None
 
@@ -113,8 +131,23 @@ class Stage:
     def init(self):
         if self.env is None:
             self.env = self.env_class(**self.env_args)
+
+            if isinstance(self.warm_start_from, str):
+                self.warm_start()
+
             self.agent = self.agent_class(self.env, **self.agent_args)
 
+    def warm_start(self):
+        """Copies the checkpoint of another agent (e.g. a previous stage's one, given by its name in
+           `warm_start_from`) into this stage's weights folder, so that the agent starts from those
+           weights instead of re-building and re-training its networks from scratch.
+        """
+        weights_dir = self.agent_args.get('weights_dir', 'weights')
+
+        utils.copy_folder(src=os.path.join(weights_dir, self.warm_start_from),
+                          dst=os.path.join(weights_dir, self.agent_args['name']))
+        self.agent_args['load'] = True
+
     def run(self, epochs: int, collect: Union[bool, int] = True, representation=True):
         assert epochs > 0
         self.init()
@@ -211,6 +244,33 @@ def collect_experience(episodes: int, timesteps: int, threshold=0.0, env_class=C
     wrapper.collect(episodes, timesteps, episode_reward_threshold=threshold)
 
 
+def collect_experience_parallel(episodes: int, timesteps: int, num_workers=2, base_port=2000, port_spacing=2,
+                                name='collect', **kwargs):
+    """Splits the collection of `episodes` traces among `num_workers` processes, one per CARLA server.
+        - A CARLA server must already listen on each port `base_port + i * port_spacing` (a server
+          takes two consecutive ports, hence the default spacing of 2).
+        - Worker `i` saves its traces under the sub-folder `{name}-{i}`, so that files never collide.
+        - The remaining arguments are the same as `collect_experience(...)`.
+    """
+    assert num_workers >= 1
+    assert episodes >= num_workers
+
+    processes = []
+
+    for i in range(num_workers):
+        # spread the episodes as evenly as possible among workers
+        worker_episodes = episodes // num_workers + (1 if i < episodes % num_workers else 0)
+
+        process = mp.Process(target=collect_experience, args=(worker_episodes, timesteps),
+                             kwargs=dict(kwargs, port=base_port + i * port_spacing, name=f'{name}-{i}'),
+                             name=f'collect-worker-{i}')
+        process.start()
+        processes.append(process)
+
+    for process in processes:
+        process.join()
+
+
 def imitation_learning(batch_size=64, lr=1e-3, alpha=0.5, beta=0.5, clip=1.0, epochs=1, load=False,
                        name='imitation', polyak=0.99, time_horizon=1, **kwargs):
     """Performs imitation learning on the already recorded experience traces (given by `name` argument).
@@ -310,21 +370,14 @@ def explore_traces(traces_dir: str, amount=64, seed=None):
 def stage_s1(episodes: int, timesteps: int, batch_size: int, save_every=None, seed=42, stage_name='stage-s1', **kwargs):
     """Stage-1: origins (n=10) fixed by seed. Town-3, reverse gear disabled
                 No dynamic objects."""
-    policy_lr = kwargs.pop('policy_lr', 3e-4)
-    value_lr = kwargs.pop('value_lr', 3e-4)
-    clip_ratio = kwargs.pop('clip_ratio', 0.2)
-    entropy = kwargs.pop('entropy_regularization', 0.1)
-    dynamics_lr = kwargs.pop('dynamics_lr', 3e-4)
+    hparams = StageHParams.from_kwargs(kwargs)
 
     agent_dict = define_agent(
         class_=CARLAgent, **kwargs,
         batch_size=batch_size, name=stage_name, traces_dir=None, seed=seed,
         advantage_scale=2.0,
-        policy_lr=policy_lr,
-        value_lr=value_lr,
-        dynamics_lr=dynamics_lr,
-        entropy_regularization=entropy, shuffle_batches=False, drop_batch_remainder=True, shuffle=True,
-        clip_ratio=clip_ratio, consider_obs_every=1, clip_norm=1.0, update_dynamics=True)
+        **hparams._asdict(), shuffle_batches=False, drop_batch_remainder=True, shuffle=True,
+        consider_obs_every=1, clip_norm=1.0, update_dynamics=True)
 
     env_dict = define_env(town=None, debug=True,
                           image_shape=(90, 120, 3),
@@ -340,21 +393,14 @@ def stage_s1(episodes: int, timesteps: int, batch_size: int, save_every=None, se
 
 def stage_s2(episodes: int, timesteps: int, batch_size: int, save_every=None, seed=42, stage_name='stage-s2', **kwargs):
     """Stage-2: 50 random origins + 50 pedestrians"""
-    policy_lr = kwargs.pop('policy_lr', 3e-4)
-    value_lr = kwargs.pop('value_lr', 3e-4)
-    clip_ratio = kwargs.pop('clip_ratio', 0.2)
-    entropy = kwargs.pop('entropy_regularization', 0.1)
-    dynamics_lr = kwargs.pop('dynamics_lr', 3e-4)
+    hparams = StageHParams.from_kwargs(kwargs)
 
     agent_dict = define_agent(
         class_=CARLAgent, **kwargs,
         batch_size=batch_size, name=stage_name, traces_dir=None, load=True, seed=seed,
         advantage_scale=2.0, load_full=True,
-        policy_lr=policy_lr,
-        value_lr=value_lr,
-        dynamics_lr=dynamics_lr,
-        entropy_regularization=entropy, shuffle_batches=False, drop_batch_remainder=True, shuffle=True,
-        clip_ratio=clip_ratio, consider_obs_every=1, clip_norm=1.0, update_dynamics=True)
+        **hparams._asdict(), shuffle_batches=False, drop_batch_remainder=True, shuffle=True,
+        consider_obs_every=1, clip_norm=1.0, update_dynamics=True)
 
     env_dict = define_env(town=None, debug=True, throttle_as_desired_speed=True,
                           image_shape=(90, 120, 3),
@@ -370,21 +416,14 @@ def stage_s2(episodes: int, timesteps: int, batch_size: int, save_every=None, se
 
 def stage_s3(episodes: int, timesteps: int, batch_size: int, save_every=None, seed=42, stage_name='stage-s3', **kwargs):
     """Stage-3: random origin with 50 vehicles and 50 pedestrians + random light weather"""
-    policy_lr = kwargs.pop('policy_lr', 3e-4)
-    value_lr = kwargs.pop('value_lr', 3e-4)
-    clip_ratio = kwargs.pop('clip_ratio', 0.2)
-    entropy = kwargs.pop('entropy_regularization', 0.1)
-    dynamics_lr = kwargs.pop('dynamics_lr', 3e-4)
+    hparams = StageHParams.from_kwargs(kwargs)
 
     agent_dict = define_agent(
         class_=CARLAgent, **kwargs,
         batch_size=batch_size, name=stage_name, traces_dir=None, load=True, seed=seed,
         advantage_scale=2.0, load_full=True,
-        policy_lr=policy_lr,
-        value_lr=value_lr,
-        dynamics_lr=dynamics_lr,
-        entropy_regularization=entropy, shuffle_batches=False, drop_batch_remainder=True, shuffle=True,
-        clip_ratio=clip_ratio, consider_obs_every=1, clip_norm=1.0, update_dynamics=True)
+        **hparams._asdict(), shuffle_batches=False, drop_batch_remainder=True, shuffle=True,
+        consider_obs_every=1, clip_norm=1.0, update_dynamics=True)
 
     light_weathers = [
         carla.WeatherParameters.ClearNoon,
@@ -411,21 +450,14 @@ def stage_s3(episodes: int, timesteps: int, batch_size: int, save_every=None, se
 def stage_s4(episodes: int, timesteps: int, batch_size: int, towns=None, save_every=None, seed=42,
              stage_name='stage-s4', **kwargs):
     """Stage-4: town with regular traffic (50 vehicles and 50 pedestrians) + random light weather + data-aug"""
-    policy_lr = kwargs.pop('policy_lr', 3e-4)
-    value_lr = kwargs.pop('value_lr', 3e-4)
-    clip_ratio = kwargs.pop('clip_ratio', 0.2)
-    entropy = kwargs.pop('entropy_regularization', 0.1)
-    dynamics_lr = kwargs.pop('dynamics_lr', 3e-4)
+    hparams = StageHParams.from_kwargs(kwargs)
 
     agent_dict = define_agent(
         class_=CARLAgent, **kwargs,
         batch_size=batch_size, name=stage_name, traces_dir=None, load=True, seed=seed,
         advantage_scale=2.0, load_full=True,
-        policy_lr=policy_lr,
-        value_lr=value_lr,
-        dynamics_lr=dynamics_lr,
-        entropy_regularization=entropy, shuffle_batches=False, drop_batch_remainder=True, shuffle=True,
-        clip_ratio=clip_ratio, consider_obs_every=1, clip_norm=1.0, update_dynamics=True)
+        **hparams._asdict(), shuffle_batches=False, drop_batch_remainder=True, shuffle=True,
+        consider_obs_every=1, clip_norm=1.0, update_dynamics=True)
 
     light_weathers = [
         carla.WeatherParameters.ClearNoon,
@@ -452,21 +484,14 @@ def stage_s4(episodes: int, timesteps: int, batch_size: int, towns=None, save_ev
 def stage_s5(episodes: int, timesteps: int, batch_size: int, town: str, save_every=None, seed=42, stage_name='stage-s5',
              weather=None, traffic='dense', **kwargs):
     """Stage-5: town with dense traffic (100 vehicles and 200 pedestrians) + random light weather + data-aug"""
-    policy_lr = kwargs.pop('policy_lr', 3e-4)
-    value_lr = kwargs.pop('value_lr', 3e-4)
-    clip_ratio = kwargs.pop('clip_ratio', 0.2)
-    entropy = kwargs.pop('entropy_regularization', 0.1)
-    dynamics_lr = kwargs.pop('dynamics_lr', 3e-4)
+    hparams = StageHParams.from_kwargs(kwargs)
 
     agent_dict = define_agent(
         class_=CARLAgent, **kwargs,
         batch_size=batch_size, name=stage_name, traces_dir=None, load=True,
         advantage_scale=2.0, load_full=True, seed=seed,
-        policy_lr=policy_lr,
-        value_lr=value_lr,
-        dynamics_lr=dynamics_lr,
-        entropy_regularization=entropy, shuffle_batches=False, drop_batch_remainder=True, shuffle=True,
-        clip_ratio=clip_ratio, consider_obs_every=1, clip_norm=1.0, update_dynamics=True)
+        **hparams._asdict(), shuffle_batches=False, drop_batch_remainder=True, shuffle=True,
+        consider_obs_every=1, clip_norm=1.0, update_dynamics=True)
 
     light_weathers = [
         carla.WeatherParameters.ClearNoon,
@@ -206,6 +206,7 @@ class CARLANetwork(networks.PPONetwork):
 
     def policy_branch(self, index: int, **kwargs):
         branch = self.policy_layers(self.intermediate_inputs, **kwargs)
+        self.last_policy_layer = branch
         distribution_out = self.get_distribution_layer(branch, index)
 
         # auxiliary outputs
@@ -219,13 +220,19 @@ class CARLANetwork(networks.PPONetwork):
     def value_network(self, **kwargs) -> Model:
         exp_scale = kwargs.pop('exponent_scale', 6.0)
         components = kwargs.pop('components', 1)
-        branch_out = self.value_branch(0, exp_scale, components, **kwargs)
+        shared = kwargs.pop('shared', False)
+        branch_out = self.value_branch(0, exp_scale, components, shared=shared, **kwargs)
 
         outputs = dict(value=branch_out[:, 0:2], similarity=branch_out[:, 2], speed=branch_out[:, 3])
         return Model(inputs=self.intermediate_inputs, outputs=outputs, name='Value-Network')
 
-    def value_branch(self, index: int, exp_scale: float, components: int, **kwargs):
-        branch = self.value_layers(self.intermediate_inputs, **kwargs)
+    def value_branch(self, index: int, exp_scale: float, components: int, shared=False, **kwargs):
+        if shared:
+            # structural sharing: reuse the policy branch, so the value function reduces to its heads
+            branch = self.last_policy_layer
+        else:
+            branch = self.value_layers(self.intermediate_inputs, **kwargs)
+
         value = self.value_head(branch, index, exponent_scale=exp_scale, components=components)
 
         # auxiliary outputs
@@ -239,10 +246,10 @@ class CARLANetwork(networks.PPONetwork):
     def value_head(self, layer: Layer, index=0, exponent_scale=6.0, **kwargs):
         assert exponent_scale > 0.0
 
-        base = Dense(units=1, activation=tf.nn.tanh, bias_initializer='glorot_uniform',
+        base = Dense(units=1, activation=tf.nn.tanh, bias_initializer='glorot_uniform', dtype='float32',
                      name=f'v-base-{index}')(layer)
         exp = Dense(units=1, activation=lambda x: exponent_scale * tf.nn.sigmoid(x), bias_initializer='glorot_uniform',
-                    name=f'v-exp-{index}')(layer)
+                    dtype='float32', name=f'v-exp-{index}')(layer)
 
         return concatenate([base, exp], axis=1)
 
@@ -250,9 +257,9 @@ class CARLANetwork(networks.PPONetwork):
         num_actions = self.agent.num_actions
 
         alpha = Dense(units=num_actions, activation=utils.softplus(1.0 + 1e-2), bias_initializer='glorot_uniform',
-                      name=f'alpha-{index}')(layer)
+                      dtype='float32', name=f'alpha-{index}')(layer)
         beta = Dense(units=num_actions, activation=utils.softplus(1.0 + 1e-2), bias_initializer='glorot_uniform',
-                     name=f'beta-{index}')(layer)
+                     dtype='float32', name=f'beta-{index}')(layer)
 
         self.beta = tfp.layers.DistributionLambda(
                 make_distribution_fn=lambda t: tfp.distributions.Beta(t[0], t[1]),
@@ -5,3 +5,4 @@ import rl.augmentations
 from rl.agents import PPOAgent
 from rl.agents.ppo import PPOMemory
 from rl.environments.carla.environment import *
+from rl.environments.parallel import SyncVectorEnv, SubprocVectorEnv
@@ -152,13 +152,21 @@ class Agent:
 
         agent.learn(**args)
 
+    # cached preprocessing function, see `preprocess()`
+    _preprocess_fn = None
+
     # TODO: one fn for training and another for evaluation?
     def preprocess(self):
-        @tf.function
-        def preprocess_fn(_):
-            return _
+        # built once and cached: returning a fresh tf.function at each episode (preprocess is called
+        # once per episode in learn) would force TensorFlow to re-trace it every time
+        if self._preprocess_fn is None:
+            @tf.function
+            def preprocess_fn(_):
+                return _
+
+            self._preprocess_fn = preprocess_fn
 
-        return preprocess_fn
+        return self._preprocess_fn
 
     def log(self, **kwargs):
         self.statistics.log(**kwargs)
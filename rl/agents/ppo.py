@@ -19,6 +19,28 @@ from tensorflow.keras import losses
 from tensorflow.keras.optimizers.schedules import LearningRateSchedule
 
 
+def _normalize_interval(value: Union[bool, str, int], episodes: int, name: str, divisor=False) -> int:
+    """Normalizes an every-N-episodes argument (False/True/'end'/int) into a plain episode interval,
+       validating it once with a clear error message.
+    """
+    if value is False or value is None:
+        return episodes + 1
+
+    if value is True:
+        return 1
+
+    if value == 'end':
+        return episodes
+
+    if not isinstance(value, int) or value <= 0:
+        raise ValueError(f'`{name}` should be a bool, "end", or a positive int, got: {value}.')
+
+    if divisor and (episodes % value != 0):
+        raise ValueError(f'`{name}` ({value}) should exactly divide `episodes` ({episodes}).')
+
+    return value
+
+
 class PPOAgent(Agent):
     # TODO: dynamic-parameters: gamma, lambda, opt_steps, update_freq?, polyak?, clip_norm
     # TODO: debug each action separately
@@ -29,10 +51,19 @@ class PPOAgent(Agent):
                  clip_ratio: Union[float, LearningRateSchedule, DynamicParameter] = 0.2, seed_regularization=False,
                  entropy_regularization: Union[float, LearningRateSchedule, DynamicParameter] = 0.0,
                  network: Union[dict, PPONetwork] = None, update_frequency=1, polyak=1.0, repeat_action=1,
-                 advantage_scale: Union[float, LearningRateSchedule, DynamicParameter] = 2.0, **kwargs):
+                 advantage_scale: Union[float, LearningRateSchedule, DynamicParameter] = 2.0,
+                 mixed_precision: Union[bool, str] = False, **kwargs):
         assert 0.0 < polyak <= 1.0
         assert repeat_action >= 1
 
+        # Mixed-precision: set the global policy before any network is built, so that hidden layers
+        # compute in float16 while the output heads (see networks) stay float32 for stability.
+        # NOTE: no dynamic loss-scaling is wired into the optimizers yet, so validate rewards/losses
+        # against a full-precision run when enabling this.
+        if mixed_precision:
+            from tensorflow.keras.mixed_precision import experimental as precision
+            precision.set_policy(mixed_precision if isinstance(mixed_precision, str) else 'mixed_float16')
+
         super().__init__(*args, name=name, **kwargs)
 
         self.memory: PPOMemory = None
@@ -78,9 +109,10 @@ class PPOAgent(Agent):
             network_class = network.pop('network', PPONetwork)
 
             if network_class is PPONetwork:
-                # policy/value-specific arguments
-                policy_args = network.pop('policy', {})
-                value_args = network.pop('value', policy_args)
+                # policy/value-specific arguments: copied, so that shared (e.g. class-level default) spec
+                # dicts are never mutated by the merge below
+                policy_args = dict(network.pop('policy', {}))
+                value_args = dict(network.pop('value', policy_args))
 
                 # common arguments
                 for k, v in network.items():
@@ -184,6 +216,16 @@ class PPOAgent(Agent):
         action = self.network.act(inputs=state)
         return self.convert_action(action)
 
+    def acts(self, states: list) -> list:
+        """Batched version of `act`: stacks one state per (parallel) environment into a single forward
+           pass, then splits the predicted actions back, one per environment.
+           - Use together with SyncVectorEnv/SubprocVectorEnv to amortize the network call's overhead.
+        """
+        inputs = utils.concat_tensors(*[utils.to_tensor(state) for state in states])
+        actions = self.network.act(inputs=inputs)
+
+        return [self.convert_action(tf.expand_dims(action, axis=0)) for action in actions]
+
     def predict(self, state, *args, **kwargs):
         return self.network.predict(inputs=state)
 
@@ -191,9 +233,9 @@ class PPOAgent(Agent):
         t0 = time.time()
         self.seed_regularization()
 
-        # Prepare data:
-        value_batches = self.get_value_batches()
-        policy_batches = self.get_policy_batches()
+        # Prepare data; batching is skipped entirely for networks that take no optimization step:
+        value_batches = self.get_value_batches() if self.optimization_steps['value'] > 0 else []
+        policy_batches = self.get_policy_batches() if self.optimization_steps['policy'] > 0 else []
 
         # Policy network optimization:
         for opt_step in range(self.optimization_steps['policy']):
@@ -484,21 +526,12 @@ class PPOAgent(Agent):
 
     def learn(self, episodes: int, timesteps: int, save_every: Union[bool, str, int] = False,
               render_every: Union[bool, str, int] = False, close=True):
-        assert episodes % self.update_frequency == 0
-
-        if save_every is False:
-            save_every = episodes + 1
-        elif save_every is True:
-            save_every = 1
-        elif save_every == 'end':
-            save_every = episodes
-        else:
-            assert episodes % save_every == 0
+        if episodes % self.update_frequency != 0:
+            raise ValueError(f'`episodes` ({episodes}) should be a multiple of '
+                             f'`update_frequency` ({self.update_frequency}).')
 
-        if render_every is False:
-            render_every = episodes + 1
-        elif render_every is True:
-            render_every = 1
+        save_every = _normalize_interval(save_every, episodes, name='save_every', divisor=True)
+        render_every = _normalize_interval(render_every, episodes, name='render_every')
 
         try:
             self.memory = self.get_memory()
@@ -722,8 +755,7 @@ class PPOMemory:
         returns = utils.rewards_to_go(self.rewards[self.index:], discount=discount)
         returns = utils.to_float(returns)
 
-        new_returns = tf.map_fn(fn=utils.decompose_number, elems=returns, dtype=(tf.float32, tf.float32))
-        new_returns = tf.stack(new_returns, axis=1)
+        new_returns = tf.stack(utils.decompose_numbers(returns), axis=1)
 
         if (self.returns is None) or (not append):
             self.returns = new_returns
@@ -1,2 +1,3 @@
 
 from rl.environments.carla.environment import *
+from rl.environments.parallel import SyncVectorEnv, SubprocVectorEnv
@@ -9,6 +9,7 @@ import numpy as np
 
 from gym import spaces
 from typing import Callable, Dict, Union, List
+from concurrent.futures import ThreadPoolExecutor
 from pygame.constants import K_q, K_UP, K_w, K_LEFT, K_a, K_RIGHT, K_d, K_DOWN, K_s, K_SPACE, K_ESCAPE, KMOD_CTRL
 
 from rl import utils as rl_utils
@@ -577,12 +578,17 @@ class CARLAPlayWrapper(CARLAWrapper):
         self.env = env
         self._steer_cache = 0.0
 
+        # currently held keys, kept up-to-date from the event queue (see `_parse_events`) so that
+        # the whole keyboard state is never polled at each frame
+        self._held_keys = set()
+
         # Wrap environment's methods:
         self.env.actions_to_control = lambda actions: self.actions_to_control(self.env, actions)
         self.env.before_world_step = lambda: self.before_world_step(self.env)
 
     def reset(self) -> dict:
         self._steer_cache = 0.0
+        self._held_keys.clear()
         return self.env.reset()
 
     def play(self):
@@ -606,7 +612,12 @@ class CARLAPlayWrapper(CARLAWrapper):
             if event.type == pygame.QUIT:
                 self.env.close()
 
+            elif event.type == pygame.KEYDOWN:
+                self._held_keys.add(event.key)
+
             elif event.type == pygame.KEYUP:
+                self._held_keys.discard(event.key)
+
                 if self._is_quit_shortcut(event.key):
                     raise Exception('closing...')
 
@@ -620,32 +631,32 @@ class CARLAPlayWrapper(CARLAWrapper):
         return (key == K_ESCAPE) or (key == K_q and pygame.key.get_mods() & KMOD_CTRL)
 
     def _parse_vehicle_keys(self):
-        keys = pygame.key.get_pressed()
+        keys = self._held_keys
         steer_increment = 5e-4 * self.env.clock.get_time()
 
-        if keys[K_LEFT] or keys[K_a]:
+        # the cache is clamped only in the branches that change it
+        if (K_LEFT in keys) or (K_a in keys):
             if self._steer_cache > 0:
-                self._steer_cache = 0
+                self._steer_cache = 0.0
             else:
-                self._steer_cache -= steer_increment
+                self._steer_cache = max(-1.0, self._steer_cache - steer_increment)
 
-        elif keys[K_RIGHT] or keys[K_d]:
+        elif (K_RIGHT in keys) or (K_d in keys):
             if self._steer_cache < 0:
-                self._steer_cache = 0
+                self._steer_cache = 0.0
             else:
-                self._steer_cache += steer_increment
+                self._steer_cache = min(1.0, self._steer_cache + steer_increment)
         else:
             self._steer_cache = 0.0
 
-        self._steer_cache = min(1.0, max(-1.0, self._steer_cache))
         self.env.control.reverse = self.env.control.gear < 0
 
-        # actions
-        throttle = 1.0 if keys[K_UP] or keys[K_w] else 0.0
-        steer = round(self._steer_cache, 1)
-        brake = 1.0 if keys[K_DOWN] or keys[K_s] else 0.0
+        # actions: steer is quantized at one decimal with integer math, cheaper than round()
+        throttle = 1.0 if (K_UP in keys) or (K_w in keys) else 0.0
+        steer = int(self._steer_cache * 10.0 + (0.5 if self._steer_cache > 0 else -0.5)) / 10.0
+        brake = 1.0 if (K_DOWN in keys) or (K_s in keys) else 0.0
         reverse = 1.0 if self.env.control.reverse else 0.0
-        hand_brake = keys[K_SPACE]
+        hand_brake = K_SPACE in keys
 
         return [throttle, steer, brake, reverse, hand_brake]
 
@@ -670,18 +681,39 @@ class CARLACollectWrapper(CARLAWrapper):
     """
 
     def __init__(self, env: CARLABaseEnvironment, ignore_traffic_light: bool, traces_dir='traces', name='carla',
-                 behaviour='normal'):
+                 behaviour='normal', memmap_dir: str = None, quantize=False):
         super().__init__(env)
         self.env = env
         self.agent = None
         self.agent_behaviour = behaviour  # 'normal', 'cautious', or 'aggressive'
         self.ignore_traffic_light = ignore_traffic_light
 
+        # optional quantization: image-like (3-D) observations are stored as uint8 instead of
+        # float32, shrinking buffers and traces by 4x; `rl.utils.unpack_trace` undoes the scaling
+        self.quantize = quantize
+        self.quantized_keys = set()
+
+        # optional disk-backed buffers: with long horizons (or big images) the buffers may not fit
+        # in RAM, so they can be memory-mapped onto .npy files stored in `memmap_dir`
+        self.memmap_dir = rl_utils.makedir(memmap_dir) if isinstance(memmap_dir, str) else None
+
         # Saving & Buffers
         self.save_dir = rl_utils.makedir(traces_dir, name)
         print('save_dir:', self.save_dir)
+
+        # one timestamp per run: it keeps filenames from different runs apart, while within a run
+        # the episode number already makes them unique (so no per-trace strftime call is needed)
+        self.run_timestamp = time.strftime('%Y%m%d-%H%M%S')
         self.buffer = None
+        self.buffer_size = None
+        self.writers = None
         self.timestep = 0
+        self._store_fn = None
+
+        # Background saving: one worker thread compresses and writes the traces, so that the
+        # collection of the next episode does not stall on np.savez_compressed
+        self.save_executor = ThreadPoolExecutor(max_workers=1)
+        self.pending_save = None
 
         # Check for collisions
         self.have_collided = False
@@ -691,8 +723,14 @@ class CARLACollectWrapper(CARLAWrapper):
         self.timestep = 0
         observation = self.env.reset()
 
-        self.agent = BehaviorAgent(vehicle=self.env.vehicle, behavior=self.agent_behaviour,
-                                   ignore_traffic_light=self.ignore_traffic_light)
+        # the agent is built once then re-bound to the respawned vehicle: re-creating it would
+        # also rebuild the global route planner's graph at every episode
+        if self.agent is None:
+            self.agent = BehaviorAgent(vehicle=self.env.vehicle, behavior=self.agent_behaviour,
+                                       ignore_traffic_light=self.ignore_traffic_light)
+        else:
+            self.agent.set_vehicle(self.env.vehicle)
+
         self.agent.set_destination(start_location=self.env.vehicle.get_location(), end_location=self.env.destination,
                                    clean=True)
         return observation
@@ -751,15 +789,31 @@ class CARLACollectWrapper(CARLAWrapper):
                 else:
                     print(f'Trace-{episode} discarded because reward={round(episode_reward, 2)} below threshold!')
         finally:
+            # make sure the last trace has been written before tearing down
+            if self.pending_save is not None:
+                self.pending_save.result()
+
             env.unregister_event(event=CARLAEvent.ON_COLLISION, callback=self.on_collision)
             if close:
                 env.close()
 
     def init_buffer(self, num_timesteps: int):
+        # reuse the buffers when the horizon is unchanged: transitions are overwritten in-place,
+        # so a new allocation (and spec flattening) is only needed when shapes change
+        if (self.buffer is not None) and (self.buffer_size == num_timesteps):
+            self.timestep = 0
+            return
+
+        self.buffer_size = num_timesteps
+
         # partial buffer: misses 'state', 'action', and 'info'
         self.buffer = dict(reward=np.zeros(shape=num_timesteps),
                            done=np.zeros(shape=num_timesteps))
 
+        # flat "writers": for each transition entry, the (key-path, buffer-key) pairs of its leaves.
+        # Precomputed once here, so that storing does neither recursion nor f-string key building.
+        self.writers = dict(reward=[((), 'reward')], done=[((), 'done')])
+
         obs_spec = rl_utils.space_to_spec(space=self.env.observation_space)
         act_spec = rl_utils.space_to_spec(space=self.env.action_space)
         info_spec = rl_utils.space_to_spec(space=self.env.info_space)
@@ -772,57 +826,100 @@ class CARLACollectWrapper(CARLAWrapper):
         self._apply_space_spec(spec=obs_spec, size=num_timesteps, name='state')
         self._apply_space_spec(spec=act_spec, size=num_timesteps, name='action')
         self._apply_space_spec(spec=info_spec, size=num_timesteps, name='info')
+
+        self._store_fn = self._build_store_fn()
         self.timestep = 0
 
     def store_transition(self, **kwargs):
         """Collects one transition (s, a, r, d, i)"""
-        for name, value in kwargs.items():
-            self._store_item(item=value, index=self.timestep, name=name)
-
+        self._store_fn(kwargs, self.timestep)
         self.timestep += 1
 
+    def _build_store_fn(self):
+        """Specializes transition storing for the current buffer layout: entry names, key-paths,
+           target arrays and quantization flags are baked into one flat tuple, so that storing
+           iterates a single precomputed sequence with no dict or attribute lookup left.
+        """
+        writers = tuple((name, path, self.buffer[key], key in self.quantized_keys)
+                        for name, pairs in self.writers.items() for path, key in pairs)
+
+        def store_fn(transition: dict, index: int):
+            for name, path, array, quantized in writers:
+                item = transition[name]
+
+                for k in path:
+                    item = item[k]
+
+                if quantized:
+                    # images are float in [0, 1]: scale back to [0, 255]; the +0.5 makes the
+                    # truncating uint8 assignment behave as round-to-nearest
+                    item = item * 255.0 + 0.5
+
+                array[index] = item
+
+        return store_fn
+
     def end_trajectory(self) -> dict:
         """Ends a sequence of transitions {(s, a, r, d, i)_t}"""
-        # Add the reward for the terminal/final state:
-        self.buffer['reward'] = np.concatenate([self.buffer['reward'], np.array([0.0])])
-
-        # Duplicate the buffer and cut off the exceeding part (if any)
+        # Duplicate the buffer and cut off the exceeding part (if any). The slices are copied
+        # right away: the returned dict must own its data, since the persistent buffers get
+        # overwritten by the next episode (and read by the background serialization).
         buffer = dict()
 
         for key, value in self.buffer.items():
-            buffer[key] = value[:self.timestep]
+            buffer[key] = value[:self.timestep].copy()
 
-        buffer['reward'] = self.buffer['reward'][:self.timestep + 1]
+        # Add the reward for the terminal/final state to the copy only: concatenating it onto the
+        # persistent buffer would grow that by one element at every episode
+        buffer['reward'] = np.concatenate([self.buffer['reward'][:self.timestep], [0.0]])
         return buffer
 
     def serialize(self, buffer: dict, episode: int):
         """Writes to file (npz - numpy compressed format) all the transitions collected so far"""
         # Trace's file path:
-        filename = f'trace-{episode}-{time.strftime("%Y%m%d-%H%M%S")}.npz'
+        filename = f'trace-{episode}-{self.run_timestamp}.npz'
         trace_path = os.path.join(self.save_dir, filename)
 
-        # Save buffer
+        # wait for the previous write (if any is still running), then save in background
+        if self.pending_save is not None:
+            self.pending_save.result()
+
+        self.pending_save = self.save_executor.submit(self._serialize, buffer, trace_path, filename)
+
+    @staticmethod
+    def _serialize(buffer: dict, trace_path: str, filename: str):
         np.savez_compressed(file=trace_path, **buffer)
         print(f'Trace {filename} saved.')
 
-    def _apply_space_spec(self, spec: Union[tuple, dict], size: int, name: str):
+    def _apply_space_spec(self, spec: Union[tuple, dict], size: int, name: str, root: str = None, path=()):
+        if root is None:
+            root = name
+            self.writers[root] = []
+
         if not isinstance(spec, dict):
             shape = (size,) + spec
-            self.buffer[name] = np.zeros(shape=shape, dtype=np.float32)
+
+            if self.quantize and (len(spec) == 3):
+                dtype = np.uint8
+                self.quantized_keys.add(name)
+            else:
+                dtype = np.float32
+
+            if self.memmap_dir is None:
+                self.buffer[name] = np.zeros(shape=shape, dtype=dtype)
+            else:
+                # the OS pages the data in and out lazily, keeping resident memory bounded
+                self.buffer[name] = np.lib.format.open_memmap(os.path.join(self.memmap_dir, f'{name}.npy'),
+                                                              mode='w+', dtype=dtype, shape=shape)
+
+            self.writers[root].append((path, name))
             return
 
         # use recursion + names to handle arbitrary nested dicts and recognize them
         for spec_name, sub_spec in spec.items():
-            self._apply_space_spec(spec=sub_spec, size=size, name=f'{name}_{spec_name}')
-
-    def _store_item(self, item, index: int, name: str):
-        if not isinstance(item, dict):
-            self.buffer[name][index] = item
-            return
+            self._apply_space_spec(spec=sub_spec, size=size, name=f'{name}_{spec_name}',
+                                   root=root, path=path + (spec_name,))
 
-        # recursion
-        for key, value in item.items():
-            self._store_item(item=value, index=index, name=f'{name}_{key}')
 
 
 class CARLARecordWrapper:
@@ -889,10 +986,18 @@ class OneCameraCARLAEnvironment(CARLABaseEnvironment):
     def action_space(self) -> spaces.Space:
         return self.ACTION['space']
 
+    # cached observation-space: gym spaces are static, but this property is accessed frequently
+    # (e.g. at every agent/wrapper init and spec lookup), so the Dict is built only once
+    _observation_space = None
+
     @property
     def observation_space(self) -> spaces.Space:
-        return spaces.Dict(road=self.ROAD_FEATURES['space'], vehicle=self.VEHICLE_FEATURES['space'],
-                           past_control=self.CONTROL['space'], command=self.COMMAND_SPACE, image=self.image_space)
+        if self._observation_space is None:
+            self._observation_space = spaces.Dict(road=self.ROAD_FEATURES['space'],
+                                                  vehicle=self.VEHICLE_FEATURES['space'],
+                                                  past_control=self.CONTROL['space'], command=self.COMMAND_SPACE,
+                                                  image=self.image_space)
+        return self._observation_space
 
     @property
     def info_space(self) -> spaces.Space:
@@ -1077,27 +1182,29 @@ class OneCameraCARLAEnvironment(CARLABaseEnvironment):
 
         image = sensors_data['camera']
 
-        # resize image if necessary
+        # resize image if necessary (while still uint8: resizing integer pixels is cheaper)
         if image.shape != self.image_shape:
             image = env_utils.resize(image, size=self.image_size)
 
-        # 0-1 scaling
-        image /= 255.0
+        # 0-1 scaling: cast to float happens here, at the very end of the pipeline
+        image = np.asarray(image, dtype=np.float32) / 255.0
 
         # observations
         vehicle_obs = self._get_vehicle_features()
         control_obs = self._control_as_vector()
         road_obs = self._get_road_features()
 
-        obs = dict(image=image, vehicle=vehicle_obs, road=road_obs, past_control=control_obs,
-                   command=self.next_command.to_one_hot())
+        obs = {'image': image, 'vehicle': vehicle_obs, 'road': road_obs, 'past_control': control_obs,
+               'command': self.next_command.to_one_hot()}
 
         return env_utils.replace_nans(obs)
 
     def get_info(self) -> dict:
         """Returns a dict with additional information either for debugging or learning"""
-        return dict(speed=utils.speed(self.vehicle), speed_limit=self.vehicle.get_speed_limit(),
-                    similarity=self.similarity, distance_to_next_waypoint=self.route.distance_to_next_waypoint())
+        # dict literal: this runs once per step, and literals skip the dict() call overhead
+        return {'speed': utils.speed(self.vehicle), 'speed_limit': self.vehicle.get_speed_limit(),
+                'similarity': self.similarity,
+                'distance_to_next_waypoint': self.route.distance_to_next_waypoint()}
 
     def _control_as_vector(self) -> list:
         return [self.control.throttle, self.control.brake, self.control.steer, float(self.control.reverse)]
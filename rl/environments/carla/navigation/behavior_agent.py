@@ -104,6 +104,32 @@ class BehaviorAgent(Agent):
             # This method also includes stop signs and intersections.
             self.light_state = str(self.vehicle.get_traffic_light_state())
 
+    def set_vehicle(self, vehicle):
+        """
+        Re-binds the agent (and its local planner) to a new vehicle actor, e.g. a respawned one.
+        Much cheaper than creating a new agent: the global router's graph is kept, unless the
+        vehicle lives in a different map.
+
+            :param vehicle: actor to apply to local planner logic onto
+        """
+        self.vehicle = vehicle
+        self._vehicle = vehicle
+        self.world = vehicle.get_world()
+        self._world = self.world
+
+        new_map = self.world.get_map()
+
+        if new_map.name != self._map.name:
+            self._grp = None  # the cached route graph refers to the old map
+            self._map = new_map
+
+        self._local_planner.set_vehicle(vehicle, world_map=self._map)
+
+        # reset the per-episode state
+        self.light_id_to_ignore = -1
+        self.speed = 0
+        self.speed_limit = 0
+
     def set_destination(self, start_location, end_location, clean=False):
         """
         This method creates a list of waypoints from agent's position to destination location
@@ -65,6 +65,20 @@ class LocalPlanner(object):
         self._vehicle = None
         print("Resetting ego-vehicle!")
 
+    def set_vehicle(self, vehicle, world_map):
+        """
+        Re-binds the planner to a new vehicle actor, dropping any leftover plan.
+
+            :param vehicle: actor to apply to local planner logic onto
+            :param world_map: the map the vehicle lives in
+        """
+        self._vehicle = vehicle
+        self._map = world_map
+        self.waypoints_queue.clear()
+        self._waypoint_buffer.clear()
+        self.target_road_option = None
+        self.target_waypoint = None
+
     def _init_controller(self):
         """
         Controller initialization.
@@ -0,0 +1,129 @@
+"""Parallel execution of multiple copies of an environment"""
+
+import gym
+import multiprocessing as mp
+
+from multiprocessing.connection import Connection
+from typing import Callable, List
+
+
+class SyncVectorEnv(gym.Env):
+    """Steps multiple copies of an environment in lockstep, within the current process.
+       - `reset()` and `step()` deal with lists, one entry per sub-environment.
+       - Sub-environments that terminate are reset automatically, so that the returned observation is
+         the initial observation of their next episode.
+    """
+    def __init__(self, env_functions: List[Callable[[], gym.Env]]):
+        assert len(env_functions) > 0
+        self.envs = [make_env() for make_env in env_functions]
+
+        self.observation_space = self.envs[0].observation_space
+        self.action_space = self.envs[0].action_space
+
+    @property
+    def num_envs(self) -> int:
+        return len(self.envs)
+
+    def reset(self) -> list:
+        return [env.reset() for env in self.envs]
+
+    def step(self, actions: list):
+        assert len(actions) == self.num_envs
+        states, rewards, dones, infos = [], [], [], []
+
+        for env, action in zip(self.envs, actions):
+            state, reward, done, info = env.step(action)
+
+            if done:
+                state = env.reset()
+
+            states.append(state)
+            rewards.append(reward)
+            dones.append(done)
+            infos.append(info)
+
+        return states, rewards, dones, infos
+
+    def render(self, mode='human'):
+        return self.envs[0].render(mode=mode)
+
+    def close(self):
+        for env in self.envs:
+            env.close()
+
+
+def _subproc_worker(remote: Connection, make_env: Callable[[], gym.Env]):
+    """Worker loop that owns one sub-environment, executed in its own process"""
+    env = make_env()
+    try:
+        while True:
+            command, data = remote.recv()
+
+            if command == 'step':
+                state, reward, done, info = env.step(data)
+
+                if done:
+                    state = env.reset()
+
+                remote.send((state, reward, done, info))
+
+            elif command == 'reset':
+                remote.send(env.reset())
+
+            elif command == 'spaces':
+                remote.send((env.observation_space, env.action_space))
+
+            elif command == 'close':
+                break
+    finally:
+        env.close()
+        remote.close()
+
+
+class SubprocVectorEnv(gym.Env):
+    """Like SyncVectorEnv, but each sub-environment lives in its own process: environments step
+       concurrently, outside the main interpreter's GIL.
+    """
+    def __init__(self, env_functions: List[Callable[[], gym.Env]]):
+        assert len(env_functions) > 0
+        self.remotes = []
+        self.processes = []
+
+        for make_env in env_functions:
+            remote, worker_remote = mp.Pipe()
+            process = mp.Process(target=_subproc_worker, args=(worker_remote, make_env), daemon=True)
+            process.start()
+            worker_remote.close()
+
+            self.remotes.append(remote)
+            self.processes.append(process)
+
+        self.remotes[0].send(('spaces', None))
+        self.observation_space, self.action_space = self.remotes[0].recv()
+
+    @property
+    def num_envs(self) -> int:
+        return len(self.remotes)
+
+    def reset(self) -> list:
+        for remote in self.remotes:
+            remote.send(('reset', None))
+
+        return [remote.recv() for remote in self.remotes]
+
+    def step(self, actions: list):
+        assert len(actions) == self.num_envs
+
+        # send every action first, so that all sub-environments step at the same time:
+        for remote, action in zip(self.remotes, actions):
+            remote.send(('step', action))
+
+        states, rewards, dones, infos = zip(*[remote.recv() for remote in self.remotes])
+        return list(states), list(rewards), list(dones), list(infos)
+
+    def close(self):
+        for remote in self.remotes:
+            remote.send(('close', None))
+
+        for process in self.processes:
+            process.join()
@@ -13,6 +13,7 @@ from rl import utils
 class Network:
     def __init__(self, agent):
         self.agent = agent
+        self._input_layers_cache = dict()
 
     def predict(self, *args, **kwargs):
         raise NotImplementedError
@@ -42,7 +43,13 @@ class Network:
         pass
 
     def _get_input_layers(self, include_actions=False) -> Dict[str, Input]:
-        """Transforms arbitrary complex state-spaces (and, optionally, action-spaces) as input layers"""
+        """Transforms arbitrary complex state-spaces (and, optionally, action-spaces) as input layers.
+           - Input layers are built once then cached, so that policy-, old_policy- and value-network share the
+             same Input instances instead of traversing the state-spec again for each of them.
+        """
+        if include_actions in self._input_layers_cache:
+            return self._input_layers_cache[include_actions]
+
         input_layers = dict()
 
         for name, shape in self.agent.state_spec.items():
@@ -60,6 +67,7 @@ class Network:
                 layer = Input(shape=shape, dtype=tf.float32, name=name)
                 input_layers[name] = layer
 
+        self._input_layers_cache[include_actions] = input_layers
         return input_layers
 
     @staticmethod
@@ -75,7 +83,7 @@ class Network:
             num_actions = self.agent.num_actions
             num_classes = self.agent.num_classes
 
-            logits = Dense(units=num_actions * num_classes, activation='linear', name='logits')(layer)
+            logits = Dense(units=num_actions * num_classes, activation='linear', dtype='float32', name='logits')(layer)
 
             if num_actions > 1:
                 logits = Reshape((num_actions, num_classes))(logits)
@@ -91,8 +99,8 @@ class Network:
             num_actions = self.agent.num_actions
 
             # make a, b > 1, so that the Beta distribution is concave and unimodal (see paper above)
-            alpha = Dense(units=num_actions, activation=utils.softplus(1.0 + 1e-2), name='alpha')(layer)
-            beta = Dense(units=num_actions, activation=utils.softplus(1.0 + 1e-2), name='beta')(layer)
+            alpha = Dense(units=num_actions, activation=utils.softplus(1.0 + 1e-2), dtype='float32', name='alpha')(layer)
+            beta = Dense(units=num_actions, activation=utils.softplus(1.0 + 1e-2), dtype='float32', name='beta')(layer)
 
             return tfp.layers.DistributionLambda(
                 make_distribution_fn=lambda t: tfp.distributions.Beta(t[0], t[1]))([alpha, beta])
@@ -102,8 +110,8 @@ class Network:
         if distribution == 'gaussian':
             num_actions = self.agent.num_actions
 
-            mu = Dense(units=num_actions, activation='linear', name='mu')(layer)
-            sigma = Dense(units=num_actions, activation=utils.softplus(1.0 + 1e-2), name='sigma')(layer)
+            mu = Dense(units=num_actions, activation='linear', dtype='float32', name='mu')(layer)
+            sigma = Dense(units=num_actions, activation=utils.softplus(1.0 + 1e-2), dtype='float32', name='sigma')(layer)
 
             return tfp.layers.DistributionLambda(
                 make_distribution_fn=lambda t: tfp.distributions.Normal(loc=t[0], scale=t[1]))([mu, sigma])
@@ -118,17 +126,19 @@ class PPONetwork(Network):
         self.agent: PPOAgent
 
         self.distribution = self.agent.distribution_type
+        self.last_policy_layer = None
 
         # policy network
         self.policy = self.policy_network(**policy)
-        self.old_policy = self.policy_network(**policy)
-        self.update_old_policy()
 
-        # value network
+        # value network: built right after the policy, so that `shared=True` can reuse its trunk
         self.exp_scale = 6.0
         self.value = self.value_network(**value)
         self.last_value = tf.zeros((1, 2), dtype=tf.float32)  # (base, exp)
 
+        self.old_policy = self.policy_network(**policy)
+        self.update_old_policy()
+
     @tf.function
     def predict(self, inputs: Union[tf.Tensor, List[tf.Tensor], Dict[str, tf.Tensor]]):
         policy = self.old_policy(inputs, training=False)
@@ -219,13 +229,20 @@ class PPONetwork(Network):
     def policy_network(self, **kwargs):
         inputs = self._get_input_layers()
         last_layer = self.policy_layers(inputs, **kwargs)
+        self.last_policy_layer = last_layer
         action = self.get_distribution_layer(distribution=self.distribution, layer=last_layer)
 
         return Model(list(inputs.values()), outputs=action, name='Policy-Network')
 
-    def value_network(self, **kwargs):
+    def value_network(self, shared=False, **kwargs):
         inputs = self._get_input_layers()
-        last_layer = self.value_layers(inputs, **kwargs)
+
+        if shared:
+            # reuse the policy trunk: the value function becomes just a pair of heads on the
+            # policy's last feature layer, instead of a full duplicated stack of layers
+            last_layer = self.last_policy_layer
+        else:
+            last_layer = self.value_layers(inputs, **kwargs)
 
         # Gaussian value-head
         # value = self.gaussian_value_head(last_layer, **kwargs)
@@ -240,16 +257,17 @@ class PPONetwork(Network):
         assert exponent_scale > 0.0
 
         if components == 1:
-            base = Dense(units=1, activation=tf.nn.tanh, name='v-base')(layer)
-            exp = Dense(units=1, activation=lambda x: exponent_scale * tf.nn.sigmoid(x), name='v-exp')(layer)
+            base = Dense(units=1, activation=tf.nn.tanh, dtype='float32', name='v-base')(layer)
+            exp = Dense(units=1, activation=lambda x: exponent_scale * tf.nn.sigmoid(x), dtype='float32', name='v-exp')(layer)
         else:
-            weights_base = Dense(units=components, activation='softmax', name='w-base')(layer)
-            weights_exp = Dense(units=components, activation='softmax', name='w-exp')(layer)
+            weights_base = Dense(units=components, activation='softmax', dtype='float32', name='w-base')(layer)
+            weights_exp = Dense(units=components, activation='softmax', dtype='float32', name='w-exp')(layer)
 
-            base = Dense(units=components, activation=tf.nn.tanh, name='v-base')(layer)
+            base = Dense(units=components, activation=tf.nn.tanh, dtype='float32', name='v-base')(layer)
             base = utils.tf_dot_product(base, weights_base, axis=1, keepdims=True)
 
-            exp = Dense(units=components, activation=lambda x: exponent_scale * tf.nn.sigmoid(x), name='v-exp')(layer)
+            exp = Dense(units=components, activation=lambda x: exponent_scale * tf.nn.sigmoid(x), dtype='float32',
+                        name='v-exp')(layer)
             exp = utils.tf_dot_product(exp, weights_exp, axis=1, keepdims=True)
 
         return concatenate([base, exp], axis=1)
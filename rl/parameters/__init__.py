@@ -1,3 +1,3 @@
 
 from rl.parameters.parameters import DynamicParameter, ConstantParameter, ScheduleWrapper
-from rl.parameters.parameters import ExponentialDecay, StepDecay, PolynomialDecay
+from rl.parameters.parameters import ExponentialDecay, StepDecay, PolynomialDecay, PrecomputedDecay
@@ -1,5 +1,7 @@
 """Dynamic step-dependent parameters"""
 
+import numpy as np
+
 from typing import Union
 
 from tensorflow.keras.optimizers import schedules
@@ -71,6 +73,42 @@ class ConstantParameter(DynamicParameter):
         return {}
 
 
+class PrecomputedDecay(DynamicParameter):
+    """A decay schedule whose values are computed once (vectorized) into a NumPy lookup-table,
+       so that each evaluation is an O(1) array indexing instead of a per-step schedule call.
+    """
+    def __init__(self, values: np.ndarray, min_value=0.0, cycle=False):
+        super().__init__()
+        assert len(values) > 0
+
+        self.table = np.maximum(np.asarray(values, dtype=np.float32), min_value)
+        self.cycle = cycle
+        self.value = float(self.table[0])
+
+    @classmethod
+    def linear(cls, initial_value: float, final_value: float, decay_steps: int, **kwargs):
+        """Linearly decays from `initial_value` to `final_value` in `decay_steps` steps"""
+        return cls(values=np.linspace(initial_value, final_value, num=decay_steps), **kwargs)
+
+    @classmethod
+    def exponential(cls, initial_value: float, decay_steps: int, decay_rate: float, steps: int = None,
+                    staircase=False, **kwargs):
+        """Decays `initial_value` by `decay_rate` every `decay_steps` steps, over a `steps`-long horizon"""
+        exponent = np.arange(steps or decay_steps, dtype=np.float32) / decay_steps
+        exponent = np.floor(exponent) if staircase else exponent
+
+        return cls(values=initial_value * np.power(decay_rate, exponent), **kwargs)
+
+    def __call__(self, *args, **kwargs):
+        if self.cycle:
+            index = self.step % len(self.table)
+        else:
+            index = min(self.step, len(self.table) - 1)
+
+        self.value = float(self.table[index])
+        return self.value
+
+
 class ExponentialDecay(ScheduleWrapper):
     def __init__(self, initial_value: float, decay_steps: int, decay_rate: float, staircase=False, min_value=0.0):
         super().__init__(schedule=schedules.ExponentialDecay(initial_learning_rate=initial_value,
@@ -4,12 +4,12 @@ import math
 import numpy as np
 import scipy.signal
 import tensorflow as tf
-import matplotlib.pyplot as plt
 import random
 
 from typing import Union, List, Dict, Tuple, Optional
 from distutils import dir_util
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 
 from gym import spaces
 
@@ -76,8 +76,7 @@ def rewards_to_go(rewards, discount: float, decompose=False):
     returns = discount_cumsum(rewards, discount=discount)[:-1]
 
     if decompose:
-        returns_base, returns_exp = tf.map_fn(fn=decompose_number, elems=to_float(returns),
-                                              dtype=(tf.float32, tf.float32))
+        returns_base, returns_exp = decompose_numbers(returns)
 
         return tf.stack([returns_base, returns_exp], axis=1), returns
 
@@ -151,12 +150,28 @@ def decompose_number(num: float) -> (float, float):
     return num, float(exponent)
 
 
+def decompose_numbers(nums) -> (tf.Tensor, tf.Tensor):
+    """Vectorized `decompose_number`: decomposes a whole tensor at once, avoiding tf.map_fn which
+       runs its python fn once per element.
+    """
+    nums = to_float(nums)
+    abs_nums = tf.abs(nums)
+
+    # number of /10 divisions needed to bring each |num| within 1.0
+    exponents = tf.where(abs_nums > 1.0, tf.math.ceil(tf.math.log(abs_nums) / np.log(10.0)), 0.0)
+    bases = nums / tf.pow(10.0, exponents)
+
+    return bases, exponents
+
+
 # -------------------------------------------------------------------------------------------------
 # -- Plot utils
 # -------------------------------------------------------------------------------------------------
 
 def plot_images(images: list):
     """Plots a list of images, arranging them in a rectangular fashion"""
+    import matplotlib.pyplot as plt
+
     num_plots = len(images)
     rows = round(math.sqrt(num_plots))
     cols = math.ceil(math.sqrt(num_plots))
@@ -172,6 +187,8 @@ def plot_images(images: list):
 
 def plot_lr_schedule(lr_schedule: Union[DynamicParameter, LearningRateSchedule], iterations: int, initial_step=0,
                      show=True):
+    import matplotlib.pyplot as plt
+
     assert iterations > 0
     lr_schedule = DynamicParameter.create(value=lr_schedule)
 
@@ -313,6 +330,10 @@ def concat_tensors(*tensors, axis=0) -> Union[tf.Tensor, Dict[str, tf.Tensor]]:
     if isinstance(tensors[0], dict):
         return concat_dict_tensor(*tensors, axis=axis)
 
+    # single tensor: nothing to concatenate (tf.concat would copy it anyway)
+    if len(tensors) == 1:
+        return tensors[0]
+
     return tf.concat(tensors, axis=axis)
 
 
@@ -537,32 +558,40 @@ def unpack_trace(trace: dict, unpack=True) -> Union[tuple, dict]:
     """Reads a trace (i.e. a dict-like object created by np.load()) and unpacks it as a tuple
        (state, action, reward, done).
        - When `unpack is False` the (processed) trace dict is returned.
+       - Arrays are read from the trace only for the returned keys: since np.load() decompresses
+         npz members lazily (on access), unused data is streamed past instead of materialized.
     """
-    trace_keys = trace.keys()
-    trace = {k: trace[k] for k in trace_keys}  # copy
+    trace_keys = list(trace.keys())
+
+    def read(key):
+        array = trace[key]
 
-    for name in ['state', 'action']:
+        # uint8 arrays are quantized images (see CARLACollectWrapper): scale back to float [0, 1]
+        if array.dtype == np.uint8:
+            return np.asarray(array, dtype=np.float32) / 255.0
+
+        return array
+
+    def gather(name):
         # check if state/action space is simple (array, i.e sum == 1) or complex (dict of arrays)
         if sum(k.startswith(name) for k in trace_keys) == 1:
-            continue
+            return read(name)
 
         # select keys of the form 'state_xyz', then build a dict(state_xyz=trace['state_xyz'])
-        keys = filter(lambda k: k.startswith(name + '_'), trace_keys)
-        trace[name] = {k: trace[k] for k in keys}
+        return {k: read(k) for k in trace_keys if k.startswith(name + '_')}
 
-    if 'done' not in trace:
-        trace['done'] = None
+    done = trace['done'] if 'done' in trace_keys else None
 
     if unpack:
-        return trace['state'], trace['action'], to_float(trace['reward']), trace['done']
+        return gather('state'), gather('action'), to_float(trace['reward']), done
 
-    # remove fields of the form `state_x`, `action_y`, ...
-    for key in trace_keys:
-        if 'state' in key or 'action' in key:
-            if key != 'state' and key != 'action':
-                trace.pop(key)
+    # keep fields that are not of the form `state_x`, `action_y`, ...
+    result = {k: trace[k] for k in trace_keys if 'state' not in k and 'action' not in k}
+    result['state'] = gather('state')
+    result['action'] = gather('action')
+    result['done'] = done
 
-    return trace
+    return result
 
 
 def copy_folder(src: str, dst: str):
@@ -600,27 +629,40 @@ class Summary:
             self.summary_dir = os.path.join(summary_dir, name, datetime.now().strftime("%Y%m%d-%H%M%S"))
             self.tf_summary_writer = tf.summary.create_file_writer(self.summary_dir)
 
+            # summaries are written by a single background thread, so `write_summaries` only pays
+            # for snapshotting the logged values
+            self.write_executor = ThreadPoolExecutor(max_workers=1)
+            self.pending_write = None
+
     def log(self, **kwargs):
         if not self.should_log:
             return
 
+        # hot path (called at every agent step): alias the attributes and look each entry up once
+        stats = self.stats
+        allowed_keys = self.allowed_keys
+
         for key, value in kwargs.items():
-            if not self.should_log_key(key):
+            if (allowed_keys is not None) and (key not in allowed_keys):
                 continue
 
-            if key not in self.stats:
-                self.stats[key] = dict(step=0, list=[])
+            entry = stats.get(key, None)
+
+            if entry is None:
+                entry = stats[key] = dict(step=0, list=[])
+
+            values = entry['list']
 
             if tf.is_tensor(value):
                 if np.prod(value.shape) > 1:
-                    self.stats[key]['list'].extend(value)
+                    values.extend(value)
                 else:
-                    self.stats[key]['list'].append(value)
+                    values.append(value)
 
             elif hasattr(value, '__iter__'):
-                self.stats[key]['list'].extend(value)
+                values.extend(value)
             else:
-                self.stats[key]['list'].append(value)
+                values.append(value)
 
     def should_log_key(self, key: str) -> bool:
         if self.allowed_keys is None:
@@ -632,11 +674,26 @@ class Summary:
         if not self.use_summary:
             return
 
-        with self.tf_summary_writer.as_default():
-            for summary_name, data in self.stats.items():
-                step = data['step']
-                values = data['list']
+        # snapshot (and reset) the stats synchronously, then write in background: logging can keep
+        # accumulating fresh values while the previous batch is being flushed to disk
+        snapshot = {}
+
+        for summary_name, data in self.stats.items():
+            values = data['list']
+            snapshot[summary_name] = (data['step'], values)
 
+            # clear value_list, update step
+            data['step'] += len(values)
+            data['list'] = []
+
+        if self.pending_write is not None:
+            self.pending_write.result()
+
+        self.pending_write = self.write_executor.submit(self._write_summaries, snapshot)
+
+    def _write_summaries(self, snapshot: dict):
+        with self.tf_summary_writer.as_default():
+            for summary_name, (step, values) in snapshot.items():
                 if 'weight-' in summary_name or 'bias-' in summary_name:
                     tf.summary.histogram(name=summary_name, data=values, step=step)
 
@@ -652,14 +709,12 @@ class Summary:
                         tf.summary.scalar(name=summary_name, data=np.mean(value), step=step + i)
                         # tf.summary.scalar(name=summary_name, data=tf.reduce_mean(value), step=step + i)
 
-                # clear value_list, update step
-                self.stats[summary_name]['step'] += len(values)
-                self.stats[summary_name]['list'].clear()
-
             self.tf_summary_writer.flush()
 
     def plot(self, colormap='Set3'):  # Pastel1, Set3, tab20b, tab20c
         """Colormaps: https://matplotlib.org/tutorials/colors/colormaps.html"""
+        import matplotlib.pyplot as plt
+
         num_plots = len(self.stats.keys())
         cmap = plt.get_cmap(name=colormap)
         rows = round(math.sqrt(num_plots))